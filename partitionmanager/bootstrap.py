@@ -5,7 +5,6 @@ of change.
 
 from datetime import timedelta
 import logging
-import operator
 import yaml
 
 from partitionmanager.types import (
@@ -144,10 +143,11 @@ def calculate_sql_alters_from_state_info(conf, in_fp):
         ]
         ordered_prior_pos = [prior_pos[name] for name in map_data["range_cols"]]
 
-        delta_positions = list(
-            map(operator.sub, ordered_current_pos, ordered_prior_pos)
-        )
-        rate_of_change = list(map(lambda pos: pos / time_delta, delta_positions))
+        delta_positions = [
+            current - prior
+            for current, prior in zip(ordered_current_pos, ordered_prior_pos)
+        ]
+        rate_of_change = [pos / time_delta for pos in delta_positions]
 
         max_val_part = map_data["partitions"][-1]
         if not isinstance(max_val_part, MaxValuePartition):
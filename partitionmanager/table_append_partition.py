@@ -3,8 +3,8 @@ Design and perform partition management.
 """
 
 from datetime import timedelta
+import functools
 import logging
-import operator
 import re
 
 from partitionmanager.types import (
@@ -23,7 +23,20 @@ from partitionmanager.types import (
     TableInformationException,
     UnexpectedPartitionException,
 )
-from .tools import pairwise, iter_show_end
+from .tools import iter_show_end
+
+# Matches the partitioning clause and each partition definition at the start of
+# a line within a table creation string; the named group identifies which one
+# matched.
+_PARTITION_RE = re.compile(
+    r"(?m)^[ (]*(?:"
+    r"(?P<range>PARTITION BY RANGE\s+(?:COLUMNS)?\((?P<range_cols>[\w,` ]+)\))"
+    r"|(?P<member>PARTITION\s+`(?P<member_name>\w+)` "
+    r"VALUES LESS THAN \((?P<member_cols>[\d, ]+)\))"
+    r"|(?P<tail>PARTITION\s+`(?P<tail_name>\w+)` "
+    r"VALUES LESS THAN \(?(?:MAXVALUE[, ]*)+\)?)"
+    r")"
+)
 
 
 def table_is_compatible(database, table):
@@ -101,37 +114,31 @@ def parse_partition_map(rows):
     """
     log = logging.getLogger("parse_partition_map")
 
-    partition_range = re.compile(
-        r"[ ]*PARTITION BY RANGE\s+(COLUMNS)?\((?P<cols>[\w,` ]+)\)"
-    )
-    partition_member = re.compile(
-        r"[ (]*PARTITION\s+`(?P<name>\w+)` VALUES LESS THAN \((?P<cols>[\d, ]+)\)"
-    )
-    partition_tail = re.compile(
-        r"[ (]*PARTITION\s+`(?P<name>\w+)` VALUES LESS THAN \(?(MAXVALUE[, ]*)+\)?"
-    )
-
-    range_cols = None
-    partitions = list()
-
     if len(rows) != 1:
         raise TableInformationException("Expected one result")
 
-    options = rows[0]
+    create_table = rows[0]["Create Table"]
+
+    range_cols = None
+    partitions = list()
 
-    for l in options["Create Table"].split("\n"):
-        range_match = partition_range.match(l)
-        if range_match:
-            range_cols = [x.strip("` ") for x in range_match.group("cols").split(",")]
-            log.debug(f"Partition range columns: {range_cols}")
+    for match in _PARTITION_RE.finditer(create_table):
+        if match.lastgroup == "range":
+            range_cols = [x.strip("` ") for x in match.group("range_cols").split(",")]
+            log.debug("Partition range columns: %s", range_cols)
 
-        member_match = partition_member.match(l)
-        if member_match:
-            part_name = member_match.group("name")
-            part_vals_str = member_match.group("cols")
-            log.debug(f"Found partition {part_name} = {part_vals_str}")
+        elif match.lastgroup == "member":
+            part_name = match.group("member_name")
+            part_vals_str = match.group("member_cols")
+            log.debug("Found partition %s = %s", part_name, part_vals_str)
 
-            part_vals = [int(x.strip("` ")) for x in part_vals_str.split(",")]
+            # The pattern only admits digits, commas and spaces, and int()
+            # ignores surrounding whitespace. Most tables partition on a
+            # single column, which needs no splitting at all.
+            if "," in part_vals_str:
+                part_vals = list(map(int, part_vals_str.split(",")))
+            else:
+                part_vals = [int(part_vals_str)]
 
             if range_cols is None:
                 raise TableInformationException(
@@ -140,21 +147,22 @@ def parse_partition_map(rows):
 
             if len(part_vals) != len(range_cols):
                 log.error(
-                    f"Partition columns {part_vals} don't match the partition range {range_cols}"
+                    "Partition columns %s don't match the partition range %s",
+                    part_vals,
+                    range_cols,
                 )
                 raise MismatchedIdException("Partition columns mismatch")
 
             pos_part = PositionPartition(part_name).set_position(part_vals)
             partitions.append(pos_part)
 
-        member_tail = partition_tail.match(l)
-        if member_tail:
+        elif match.lastgroup == "tail":
             if range_cols is None:
                 raise TableInformationException(
                     "Processing tail, but the partition definition wasn't found."
                 )
-            part_name = member_tail.group("name")
-            log.debug(f"Found tail partition named {part_name}")
+            part_name = match.group("tail_name")
+            log.debug("Found tail partition named %s", part_name)
             partitions.append(MaxValuePartition(part_name, len(range_cols)))
 
     if not partitions or not isinstance(partitions[-1], MaxValuePartition):
@@ -169,9 +177,6 @@ def split_partitions_around_positions(partition_list, current_positions):
     current_positions, a single partition whose values contain current_positions,
     and a list of all the others.
     """
-    for p in partition_list:
-        if not isinstance(p, Partition):
-            raise UnexpectedPartitionException(p)
     if not isinstance(current_positions, list):
         raise ValueError()
 
@@ -179,6 +184,8 @@ def split_partitions_around_positions(partition_list, current_positions):
     greater_or_equal_partitions = list()
 
     for p in partition_list:
+        if not isinstance(p, Partition):
+            raise UnexpectedPartitionException(p)
         if p < current_positions:
             less_than_partitions.append(p)
         else:
@@ -200,25 +207,29 @@ def get_position_increase_per_day(p1, p2):
     """
     if not isinstance(p1, PositionPartition) or not isinstance(p2, PositionPartition):
         raise ValueError("Both partitions must be PositionPartition type")
-    if None in (p1.timestamp(), p2.timestamp()):
+    p1_time = p1.timestamp()
+    p2_time = p2.timestamp()
+    if None in (p1_time, p2_time):
         # An empty list skips this pair in get_weighted_position_increase
         return list()
-    if p1.timestamp() >= p2.timestamp():
+    if p1_time >= p2_time:
         raise ValueError(f"p1 {p1} must be before p2 {p2}")
     if p1.num_columns != p2.num_columns:
         raise ValueError(f"p1 {p1} and p2 {p2} must have the same number of columns")
-    delta_time = p2.timestamp() - p1.timestamp()
-    delta_days = delta_time / timedelta(days=1)
-    delta_positions = list(map(operator.sub, p2.positions, p1.positions))
-    return list(map(lambda pos: pos / delta_days, delta_positions))
+    delta_days = (p2_time - p1_time) / timedelta(days=1)
+    return [
+        (pos2 - pos1) / delta_days for pos1, pos2 in zip(p1.positions, p2.positions)
+    ]
 
 
+@functools.lru_cache(maxsize=256)
 def generate_weights(count):
     """
-    Generate a static list of geometricly-decreasing values, starting from
-    10,000 to give a high ceiling. It could be dynamic, but eh.
+    Generate a static tuple of geometricly-decreasing values, starting from
+    10,000 to give a high ceiling. It could be dynamic, but eh. The result is
+    cached, since tables tend to keep similar numbers of partitions.
     """
-    return [10_000 / x for x in range(count, 0, -1)]
+    return tuple(10_000 / x for x in range(count, 0, -1))
 
 
 def get_weighted_position_increase_per_day_for_partitions(partitions):
@@ -233,18 +244,19 @@ def get_weighted_position_increase_per_day_for_partitions(partitions):
         raise ValueError("Partition list must not be empty")
 
     pos_rates = [
-        get_position_increase_per_day(p1, p2) for p1, p2 in pairwise(partitions)
+        get_position_increase_per_day(p1, p2)
+        for p1, p2 in zip(partitions, partitions[1:])
     ]
     weights = generate_weights(len(pos_rates))
 
-    # Initialize a list with a zero for each position
-    weighted_sums = [0] * partitions[0].num_columns
-
-    for p_r, weight in zip(pos_rates, weights):
-        for idx, val in enumerate(p_r):
-            weighted_sums[idx] += val * weight
+    # Pairs without timestamps produce an empty rate list and contribute nothing
+    weighted_sums = [
+        sum(p_r[idx] * weight for p_r, weight in zip(pos_rates, weights) if p_r)
+        for idx in range(partitions[0].num_columns)
+    ]
 
-    return list(map(lambda x: x / sum(weights), weighted_sums))
+    total_weight = sum(weights)
+    return [x / total_weight for x in weighted_sums]
 
 
 def predict_forward_position(current_positions, rate_of_change, duration):
@@ -255,17 +267,40 @@ def predict_forward_position(current_positions, rate_of_change, duration):
     """
     if len(current_positions) != len(rate_of_change):
         raise ValueError("Expected identical list sizes")
+    if duration < timedelta():
+        raise ValueError(f"Can't predict forward a negative duration: {duration}")
+    _check_rates_not_negative(rate_of_change)
 
-    for neg_rate in filter(lambda r: r < 0, rate_of_change):
-        raise ValueError(
-            f"Can't predict forward with a negative rate of change: {neg_rate}"
-        )
+    return _predict_forward_position_unchecked(
+        current_positions, rate_of_change, duration
+    )
 
-    increase = list(map(lambda x: x * duration / timedelta(days=1), rate_of_change))
-    predicted_positions = [int(p + i) for p, i in zip(current_positions, increase)]
-    for old, new in zip(current_positions, predicted_positions):
-        assert new >= old, f"Always predict forward, {new} < {old}"
-    return predicted_positions
+
+def _predict_forward_position_unchecked(current_positions, rate_of_change, duration):
+    """
+    Implementation of predict_forward_position without its validation, for
+    callers that predict repeatedly with the same rates. Callers must have
+    already validated the list sizes, and that neither the rates nor the
+    duration are negative.
+    """
+    # Only the increase is truncated, so positions are kept as exact integers
+    # and can never move backwards.
+    return [
+        p + int(r * duration / timedelta(days=1))
+        for p, r in zip(current_positions, rate_of_change)
+    ]
+
+
+def _check_rates_not_negative(rates):
+    """
+    Raise ValueError if any of the rates of change is negative, since we can
+    only predict forward.
+    """
+    for rate in rates:
+        if rate < 0:
+            raise ValueError(
+                f"Can't predict forward with a negative rate of change: {rate}"
+            )
 
 
 def predict_forward_time(current_positions, end_positions, rates, evaluation_time):
@@ -276,10 +311,7 @@ def predict_forward_time(current_positions, end_positions, rates, evaluation_tim
     if not len(current_positions) == len(end_positions) == len(rates):
         raise ValueError("Expected identical list sizes")
 
-    for neg_rate in filter(lambda r: r < 0, rates):
-        raise ValueError(
-            f"Can't predict forward with a negative rate of change: {neg_rate}"
-        )
+    _check_rates_not_negative(rates)
 
     days_remaining = [
         (end - now) / rate
@@ -329,7 +361,8 @@ def plan_partition_changes(
     if not active_partition:
         raise Exception("Active Partition can't be None")
 
-    if active_partition.timestamp() >= evaluation_time:
+    active_timestamp = active_partition.timestamp()
+    if active_timestamp >= evaluation_time:
         raise ValueError(
             f"Evaluation time ({evaluation_time}) must be after "
             f"the active partition {active_partition}."
@@ -342,7 +375,7 @@ def plan_partition_changes(
     # the rate processing to work, we need to cross the "now" and the active
     # partition's dates and positions.
     rate_relevant_partitions = filled_partitions + [
-        InstantPartition(active_partition.timestamp(), current_positions),
+        InstantPartition(active_timestamp, current_positions),
         InstantPartition(evaluation_time, active_partition.positions),
     ]
     rates = get_weighted_position_increase_per_day_for_partitions(
@@ -352,15 +385,23 @@ def plan_partition_changes(
         f"Rates of change calculated as {rates} per day from "
         f"{len(rate_relevant_partitions)} partitions"
     )
+    # The rates and lifespan are fixed from here on, so validate them once up
+    # front rather than on every forward prediction below.
+    _check_rates_not_negative(rates)
+    if allowed_lifespan < timedelta():
+        raise ValueError(f"Allowed lifespan must not be negative: {allowed_lifespan}")
 
     # We need to include active_partition in the list for the subsequent
     # calculations even though we're not actually changing it.
     results = [ChangePlannedPartition(active_partition)]
 
+    # Track the most recently planned partition's values as we go, as each
+    # prediction builds on the one before it.
+    last_positions = results[-1].positions
+    last_timestamp = results[-1].timestamp()
+
     # Adjust each of the empty partitions
     for partition in empty_partitions:
-        last_changed = results[-1]
-
         changed_partition = ChangePlannedPartition(partition)
 
         if isinstance(partition, PositionPartition):
@@ -370,13 +411,15 @@ def plan_partition_changes(
             # match the partition's name, let's rename it and mark it as an
             # important change.
             start_of_fill_time = predict_forward_time(
-                current_positions, last_changed.positions, rates, evaluation_time
+                current_positions, last_positions, rates, evaluation_time
             )
 
-            if start_of_fill_time.date() != partition.timestamp().date():
+            start_of_fill_date = start_of_fill_time.date()
+            partition_date = partition.timestamp().date()
+            if start_of_fill_date != partition_date:
                 log.info(
-                    f"Start-of-fill predicted at {start_of_fill_time.date()} "
-                    f"which is not {partition.timestamp().date()}. This change "
+                    f"Start-of-fill predicted at {start_of_fill_date} "
+                    f"which is not {partition_date}. This change "
                     f"will be marked as important to ensure that {partition} is "
                     f"moved to {start_of_fill_time:%Y-%m-%d}"
                 )
@@ -388,32 +431,36 @@ def plan_partition_changes(
             # future.
 
             partition_start_time = calculate_start_time(
-                last_changed.timestamp(), evaluation_time, allowed_lifespan
+                last_timestamp, evaluation_time, allowed_lifespan
             )
-            changed_part_pos = predict_forward_position(
-                last_changed.positions, rates, allowed_lifespan
+            changed_part_pos = _predict_forward_position_unchecked(
+                last_positions, rates, allowed_lifespan
             )
             changed_partition.set_position(changed_part_pos).set_timestamp(
                 partition_start_time
             )
 
         results.append(changed_partition)
+        last_positions = changed_partition.positions
+        last_timestamp = changed_partition.timestamp()
 
     # Ensure we have the required number of empty partitions
     while len(results) < num_empty_partitions + 1:
-        last_changed = results[-1]
         partition_start_time = calculate_start_time(
-            last_changed.timestamp(), evaluation_time, allowed_lifespan
+            last_timestamp, evaluation_time, allowed_lifespan
         )
 
-        new_part_pos = predict_forward_position(
-            last_changed.positions, rates, allowed_lifespan
+        new_part_pos = _predict_forward_position_unchecked(
+            last_positions, rates, allowed_lifespan
         )
-        results.append(
+        new_partition = (
             NewPlannedPartition()
             .set_position(new_part_pos)
             .set_timestamp(partition_start_time)
         )
+        results.append(new_partition)
+        last_positions = new_partition.positions
+        last_timestamp = new_partition.timestamp()
 
     # Final result is always MAXVALUE
     results[-1].set_as_max_value()
@@ -452,25 +499,19 @@ def generate_sql_reorganize_partition_commands(table, changes):
     """
     log = logging.getLogger(f"generate_sql_reorganize_partition_commands:{table.name}")
 
-    modified_partitions = list()
-    new_partitions = list()
-
     for p in changes:
         if not isinstance(p, PlannedPartition):
             raise UnexpectedPartitionException(p)
-        if isinstance(p, NewPlannedPartition):
-            new_partitions.append(p)
-        else:
-            modified_partitions.append(p)
+
+    new_partitions = [p for p in changes if isinstance(p, NewPlannedPartition)]
+    modified_partitions = [p for p in changes if not isinstance(p, NewPlannedPartition)]
 
     # If there's not at least one modification, bail out
-    if not new_partitions and not list(
-        filter(lambda x: x.has_modifications, modified_partitions)
-    ):
+    if not new_partitions and not any(p.has_modifications for p in modified_partitions):
         log.debug("No partitions have modifications and no new partitions")
         return
 
-    new_part_list = list()
+    new_partitions_as_partitions = [p.as_partition() for p in new_partitions]
     partition_names_set = set()
 
     for modified_partition, is_final in reversed(
@@ -479,15 +520,16 @@ def generate_sql_reorganize_partition_commands(table, changes):
         # We reverse the iterator so that we always alter the furthest-out partitions
         # first, so that we are always increasing the number of empty partitions
         # before (potentially) moving the end position near the active one
-        new_part_list = [modified_partition.as_partition()]
-        if is_final:
-            new_part_list.extend([p.as_partition() for p in new_partitions])
 
         # If there's not at least one modification, skip
         if not is_final and not modified_partition.has_modifications:
             log.debug(f"{modified_partition} does not have modifications, skip")
             continue
 
+        new_part_list = [modified_partition.as_partition()]
+        if is_final:
+            new_part_list.extend(new_partitions_as_partitions)
+
         partition_strings = list()
         for part in new_part_list:
             if part.name in partition_names_set:
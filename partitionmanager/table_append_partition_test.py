@@ -119,6 +119,24 @@ PARTITION `p_20201204` VALUES LESS THAN MAXVALUE ENGINE = InnoDB)
         self.assertEqual(results["partitions"][1], mkTailPart("p_20201204"))
         self.assertEqual(results["range_cols"], ["id"])
 
+    def test_ignores_partition_text_within_lines(self):
+        create_stmt = [
+            {
+                "Table": "dwarves",
+                "Create Table": """CREATE TABLE `dwarves` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `note` varchar(64) DEFAULT 'PARTITION `p_bogus` VALUES LESS THAN (5)',
+  PRIMARY KEY (`id`),
+) ENGINE=InnoDB AUTO_INCREMENT=3101009 DEFAULT CHARSET=utf8
+ PARTITION BY RANGE (`id`)
+(PARTITION `p_20201204` VALUES LESS THAN MAXVALUE ENGINE = InnoDB)
+""",
+            }
+        ]
+        results = parse_partition_map(create_stmt)
+        self.assertEqual(len(results["partitions"]), 1)
+        self.assertEqual(results["partitions"][0], mkTailPart("p_20201204"))
+
     def test_dual_keys_single_partition(self):
         create_stmt = [
             {
@@ -213,9 +231,24 @@ class TestSqlInput(unittest.TestCase):
         with self.assertRaises(argparse.ArgumentTypeError):
             SqlInput("my table")
 
+    def test_trailing_newline(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            SqlInput("my_table\n")
+
+    def test_non_ascii(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            SqlInput("\u017ftable")
+        with self.assertRaises(argparse.ArgumentTypeError):
+            SqlInput("\u212atable")
+
+    def test_empty(self):
+        with self.assertRaises(argparse.ArgumentTypeError):
+            SqlInput("")
+
     def test_okay(self):
         SqlInput("my_table")
         SqlInput("zz-table")
+        SqlInput("Table09")
 
 
 class TestGetPositions(unittest.TestCase):
@@ -374,8 +407,8 @@ class TestPartitionAlgorithm(unittest.TestCase):
         )
 
     def test_generate_weights(self):
-        self.assertEqual(generate_weights(1), [10000])
-        self.assertEqual(generate_weights(3), [10000 / 3, 5000, 10000])
+        self.assertEqual(generate_weights(1), (10000,))
+        self.assertEqual(generate_weights(3), (10000 / 3, 5000, 10000))
 
     def test_get_weighted_position_increase_per_day_for_partitions(self):
         with self.assertRaises(ValueError):
@@ -428,11 +461,25 @@ class TestPartitionAlgorithm(unittest.TestCase):
             predict_forward_position([1, 2], [3], timedelta(days=1))
         with self.assertRaises(ValueError):
             predict_forward_position([1, 2], [-1], timedelta(days=1))
+        with self.assertRaises(ValueError):
+            predict_forward_position([1], [1], timedelta(days=-1))
 
         self.assertEqual(predict_forward_position([0], [500], timedelta(days=1)), [500])
 
         self.assertEqual(predict_forward_position([0], [125], timedelta(days=4)), [500])
 
+        # The increase goes through timedelta arithmetic, which rounds it to
+        # whole microseconds, so float error can't lose an exact position.
+        self.assertEqual(
+            predict_forward_position([0], [1035.6], timedelta(days=30)), [31068]
+        )
+
+        # Positions beyond float precision must not be rounded
+        self.assertEqual(
+            predict_forward_position([2 ** 60 + 1], [0], timedelta(days=1)),
+            [2 ** 60 + 1],
+        )
+
     def test_predict_forward_time(self):
         t = datetime(2000, 1, 1)
 